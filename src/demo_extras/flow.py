@@ -4,7 +4,6 @@ warnings.filterwarnings("ignore", category=RuntimeWarning)
 
 # Snowflake Snowpark imports
 from snowflake.core import Root, CreateMode
-from snowflake.core.schema import Schema
 from snowflake.snowpark.functions import lit, col
 from snowflake.snowpark.context import get_active_session
 from snowflake.snowpark import functions as F
@@ -22,6 +21,7 @@ import json
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 from functools import reduce
+from concurrent.futures import ThreadPoolExecutor
 from snowflake.core.stage import Stage, StageEncryption
 import streamlit as st
 import plotly.express as px
@@ -42,13 +42,25 @@ class Demoflow():
 
     def setup(self):
         # Setting up data for demo
-        self.root.databases['SIMPLE_MLOPS_DEMO'].schemas.create(schema=Schema(name="RETAIL_DATA"), mode=CreateMode.or_replace)
-        self.root.databases['SIMPLE_MLOPS_DEMO'].schemas.create(schema=Schema(name="RETAIL_DATA"), mode=CreateMode.or_replace)
-        self.root.databases['SIMPLE_MLOPS_DEMO'].schemas.create(schema=Schema(name="FEATURE_STORE"), mode=CreateMode.or_replace)
-        self.root.databases['SIMPLE_MLOPS_DEMO'].schemas.create(schema=Schema(name="MODEL_REGISTRY"), mode=CreateMode.or_replace)
+        # Create all schemas in a single round trip using an anonymous Snowflake Scripting block
+        self.session.sql("""
+            EXECUTE IMMEDIATE $$
+            BEGIN
+                CREATE OR REPLACE SCHEMA SIMPLE_MLOPS_DEMO.RETAIL_DATA;
+                CREATE OR REPLACE SCHEMA SIMPLE_MLOPS_DEMO.FEATURE_STORE;
+                CREATE OR REPLACE SCHEMA SIMPLE_MLOPS_DEMO.MODEL_REGISTRY;
+            END;
+            $$
+        """).collect()
         self.root.databases["SIMPLE_MLOPS_DEMO"].schemas["PUBLIC"].stages.create(stage=Stage(name="PIPELINES", encryption=StageEncryption(type="SNOWFLAKE_FULL"), comment='Stage for storing pipelines.'), mode=CreateMode.or_replace)
-        self.session.table('SIMPLE_MLOPS_DEMO._DATA_GENERATION._TRANSACTIONS').filter(col('DATE') <= lit('2024-04-30')).write.save_as_table(table_name='SIMPLE_MLOPS_DEMO.RETAIL_DATA.TRANSACTIONS', mode='overwrite')
-        self.session.table('SIMPLE_MLOPS_DEMO._DATA_GENERATION._CUSTOMERS').write.save_as_table('SIMPLE_MLOPS_DEMO.RETAIL_DATA.CUSTOMERS')
+        # Both tables are independent, so copy them concurrently with server-side CTAS statements
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(self.session.sql("CREATE OR REPLACE TABLE SIMPLE_MLOPS_DEMO.RETAIL_DATA.TRANSACTIONS AS SELECT * FROM SIMPLE_MLOPS_DEMO._DATA_GENERATION._TRANSACTIONS WHERE DATE <= '2024-04-30'").collect),
+                executor.submit(self.session.sql("CREATE OR REPLACE TABLE SIMPLE_MLOPS_DEMO.RETAIL_DATA.CUSTOMERS AS SELECT * FROM SIMPLE_MLOPS_DEMO._DATA_GENERATION._CUSTOMERS").collect),
+            ]
+            for future in futures:
+                future.result()
         print('Setup finished.')
 
     def _generate_date_list(self, start_date, end_date):
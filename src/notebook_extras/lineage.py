@@ -1,4 +1,5 @@
 import json
+from operator import itemgetter
 import networkx as nx
 import plotly.graph_objects as go
 import pandas as pd
@@ -8,11 +9,260 @@ import pandas as pd
 import streamlit as st
 import streamlit as st
 
+# orjson parses the small lineage objects considerably faster; fall back to the stdlib if unavailable.
+try:
+    from orjson import loads as _loads
+except ImportError:
+    _loads = json.loads
+
+def _parse_lineage_column(df, column):
+    """Parse a SOURCE_OBJECT/TARGET_OBJECT column of JSON strings, with None for rows that are malformed."""
+    parsed = []
+    for idx, value in df[column].items():
+        try:
+            parsed.append(_loads(value))
+        except Exception as e:
+            print(f"Error parsing {column} at row {idx}: {e}")
+            parsed.append(None)
+    return pd.Series(parsed, index=df.index, dtype=object)
+
+def _summarize(G):
+    """
+    Collapse pass-through chains of a lineage graph in place.
+
+    Every node with exactly one upstream and one downstream neighbour is contracted into its
+    upstream neighbour if both share the same domain, so long chains are drawn as a single
+    super-edge without hiding nodes of other domains. The surviving node records how many
+    nodes it represents in its "count" attribute.
+    """
+    for node in list(G.nodes()):
+        if G.in_degree(node) != 1 or G.out_degree(node) != 1:
+            continue
+        source = next(iter(G.predecessors(node)))
+        # A node whose only edge is a self-loop has no upstream neighbour to merge into.
+        if source == node:
+            continue
+        if G.nodes[source].get("domain", "Unknown") != G.nodes[node].get("domain", "Unknown"):
+            continue
+        count = G.nodes[source].get("count", 1) + G.nodes[node].get("count", 1)
+        nx.contracted_nodes(G, source, node, self_loops=False, copy=False)
+        G.nodes[source].pop("contraction", None)
+        G.nodes[source]["count"] = count
+    return G
+
+def _hash_lineage_df(df):
+    """Hash a lineage DataFrame by its column labels, index and values for the figure cache."""
+    return repr(list(df.columns)).encode() + pd.util.hash_pandas_object(df, index=True).values.tobytes()
+
+@st.cache_data(max_entries=32, hash_funcs={pd.DataFrame: _hash_lineage_df})
+def _build_figure(df, short_names, initial_zoom, max_labeled_nodes, summarize_threshold):
+    """
+    Build the lineage figure for LineageHelper.visualize_lineage.
+
+    Cached on the DataFrame's contents (up to 32 figures), so Streamlit reruns with unchanged
+    lineage skip parsing, layout and trace construction.
+    """
+    # Create an empty directed graph.
+    G = nx.DiGraph()
+
+    # Parse the source and target objects column-wise.
+    src_objs = _parse_lineage_column(df, "SOURCE_OBJECT")
+    tgt_objs = _parse_lineage_column(df, "TARGET_OBJECT")
+
+    # The ultimate target is row 0's (already parsed) TARGET_OBJECT; it is assigned distance 0.
+    ultimate_target = tgt_objs.iat[0]
+    ultimate_target_id = ultimate_target["name"]
+
+    # Rows with a malformed SOURCE_OBJECT are skipped entirely. Rows with only a malformed
+    # TARGET_OBJECT still contribute their source node, but no target node or edge.
+    has_src = src_objs.notna()
+    has_edge = has_src & tgt_objs.notna()
+
+    src_names = src_objs[has_src].str.get("name").to_numpy()
+    src_domains = src_objs[has_src].str.get("domain").fillna("Unknown").to_numpy()
+    tgt_names = tgt_objs[has_edge].str.get("name").to_numpy()
+    tgt_domains = tgt_objs[has_edge].str.get("domain").fillna("Unknown").to_numpy()
+    edge_src_names = src_objs[has_edge].str.get("name").to_numpy()
+
+    # We assume that the "DISTANCE" column applies to the SOURCE_OBJECT.
+    # For non-ultimate targets we assign distance = (source distance - 1).
+    # (This works as long as the lineage chain is consistent.)
+    src_distances = df.loc[has_src, "DISTANCE"].to_numpy()
+    tgt_distances = np.where(tgt_names == ultimate_target_id, 0, df.loc[has_edge, "DISTANCE"].to_numpy() - 1)
+
+    # Reduce to one row per node, keeping the first seen domain and the smallest distance,
+    # so the graph can be bulk-loaded without per-node updates. Entries are ordered as the
+    # rows were read (ultimate target first, then each row's source before its target), so
+    # "first seen" and the node order match a row-by-row walk of the DataFrame.
+    row_order = np.concatenate([[-1], np.flatnonzero(has_src.to_numpy()), np.flatnonzero(has_edge.to_numpy())])
+    side_order = np.concatenate([[0], np.zeros(len(src_names), dtype=int), np.ones(len(tgt_names), dtype=int)])
+    read_order = np.lexsort((side_order, row_order))
+    nodes = (
+        pd.DataFrame({
+            "id": np.concatenate([[ultimate_target_id], src_names, tgt_names])[read_order],
+            "domain": np.concatenate([[ultimate_target.get("domain", "Unknown")], src_domains, tgt_domains])[read_order],
+            "distance": np.concatenate([[0], src_distances, tgt_distances])[read_order],
+        })
+        .groupby("id", sort=False)
+        .agg(domain=("domain", "first"), distance=("distance", "min"))
+    )
+    G.add_nodes_from(
+        (node_id, {"domain": domain, "distance": distance})
+        for node_id, domain, distance in zip(nodes.index, nodes["domain"], nodes["distance"])
+    )
+
+    # Add an edge from source to target (i.e. upstream relationship).
+    G.add_edges_from(zip(edge_src_names, tgt_names))
+
+    # Very large graphs are summarized so the browser only has to render the overall structure.
+    if len(G) > summarize_threshold:
+        _summarize(G)
+
+    # Walk the nodes once and keep their attributes as arrays, indexed by an integer node id,
+    # for use in the layout, the edge coordinates and the node styling below.
+    items = list(G.nodes(data=True))
+    n_nodes = len(items)
+    names = np.array([node for node, _ in items], dtype=object)
+    dists = np.fromiter((data["distance"] for _, data in items), dtype=np.int64, count=n_nodes)
+    domains = np.array([data.get("domain", "Unknown") for _, data in items], dtype=object)
+    counts = np.fromiter((data.get("count", 1) for _, data in items), dtype=np.int64, count=n_nodes)
+    idx = {node: i for i, node in enumerate(names)}
+
+    # --- Compute layout positions ------------------------------------------------
+    # Arrange nodes in vertical columns by distance using NetworkX's layered layout.
+    # Layers are passed explicitly (sorted alphabetically) so each column has a stable order.
+    # multipartite_layout puts distance 0 on the left and stacks each column bottom-up,
+    # so both axes are flipped: the ultimate target ends up on the right and each
+    # column reads alphabetically from top to bottom.
+    order = np.lexsort((names.astype(str), dists))
+    layer_dists, layer_sizes = np.unique(dists[order], return_counts=True)
+    layers = dict(zip(layer_dists.tolist(), np.split(names[order], np.cumsum(layer_sizes)[:-1])))
+    pos = nx.multipartite_layout(G, subset_key=layers, align="vertical")
+
+    # Cache positions as arrays so that coordinates can be gathered with NumPy fancy indexing.
+    px = -np.array([pos[node][0] for node in names], dtype=float)
+    py = -np.array([pos[node][1] for node in names], dtype=float)
+
+    # --- Determine axis ranges based on initial_zoom -----------------------------
+    # Compute the min and max for x and y positions.
+    if len(px):
+        x_min, x_max = px.min(), px.max()
+        y_min, y_max = py.min(), py.max()
+    else:
+        x_min, x_max = -1, 1
+        y_min, y_max = -1, 1
+
+    # Compute center and half-width/half-height.
+    x_center = (x_min + x_max) / 2
+    y_center = (y_min + y_max) / 2
+    # Add a margin factor (here 1.2) so nodes are not at the very edge.
+    margin_factor = 1.2
+    x_half = ((x_max - x_min) / 2) * margin_factor / initial_zoom
+    y_half = ((y_max - y_min) / 2) * margin_factor / initial_zoom
+
+    x_range = [x_center - x_half, x_center + x_half]
+    y_range = [y_center - y_half, y_center + y_half]
+
+    # --- Create Plotly traces for edges ------------------------------------------
+    # Prepare a single WebGL trace for edges (drawn as line segments).
+    # Each edge contributes (start, end, NaN); the NaN breaks the line between segments.
+    # The float32 arrays are handed to Plotly as-is. The pinned plotly 5.x still writes them as
+    # JSON lists: short with the orjson engine (picked automatically when orjson is installed),
+    # but at full float64 precision with the stdlib json engine. Newer Plotly sends typed arrays.
+    edges = list(G.edges())
+    n_edges = len(edges)
+    get_idx = idx.__getitem__
+    u_idx = np.fromiter(map(get_idx, map(itemgetter(0), edges)), dtype=np.int32, count=n_edges)
+    v_idx = np.fromiter(map(get_idx, map(itemgetter(1), edges)), dtype=np.int32, count=n_edges)
+    edge_x = np.empty(3 * n_edges, dtype=np.float32)
+    edge_y = np.empty(3 * n_edges, dtype=np.float32)
+    edge_x[0::3], edge_x[1::3], edge_x[2::3] = px[u_idx], px[v_idx], np.nan
+    edge_y[0::3], edge_y[1::3], edge_y[2::3] = py[u_idx], py[v_idx], np.nan
+
+    edge_trace = go.Scattergl(
+        x=edge_x,
+        y=edge_y,
+        line=dict(width=1, color='#888'),
+        hoverinfo='none',
+        mode='lines'
+    )
+
+    # --- Create Plotly traces for nodes ------------------------------------------
+    # Define a color mapping for domains (customize as needed)
+    color_map = {
+        "MODEL": "#FF5733",         # reddish
+        "DATASET": "#33C3FF",        # blueish
+        "TABLE": "#33FF57",          # greenish
+        "FEATURE_VIEW": "#FF33F6",   # magenta-ish
+    }
+
+    # Shorten the labels if required, and mark nodes that stand in for a collapsed chain.
+    labels = [name.split('.')[-1] if short_names else name for name in names]
+    labels = [f"{label} (+{count - 1} collapsed)" if count > 1 else label for label, count in zip(labels, counts.tolist())]
+    # Summarized nodes grow with the number of nodes they represent.
+    sizes = np.minimum(30 * np.sqrt(counts), 90)
+    # Look up each domain's color once and map it onto the nodes by integer domain code.
+    domain_codes, unique_domains = pd.factorize(domains)
+    palette = np.array([color_map.get(domain, "#CCCCCC") for domain in unique_domains], dtype=object)
+    colors = palette[domain_codes]
+
+    # Drawing a text label per node dominates render time for large graphs,
+    # so beyond the threshold labels are only shown on hover.
+    show_labels = n_nodes <= max_labeled_nodes
+
+    # All domains share a single WebGL trace with a per-node color array.
+    # One trace means one draw call, instead of one scene rebuild per domain.
+    node_traces = [
+        go.Scattergl(
+            x=px,
+            y=py,
+            mode='markers+text' if show_labels else 'markers',
+            text=labels if show_labels else None,
+            textposition="bottom center",
+            hovertext=labels,
+            hoverinfo='text',
+            showlegend=False,
+            marker=dict(
+                showscale=False,
+                color=colors.tolist(),
+                size=sizes,
+                line_width=2
+            )
+        )
+    ]
+
+    # Add an empty trace per domain purely to get a legend entry with the domain's color.
+    for domain, color in zip(unique_domains, palette):
+        node_traces.append(
+            go.Scattergl(
+                x=[None],
+                y=[None],
+                mode='markers',
+                name=domain,  # legend entry will show the domain name.
+                marker=dict(color=color, size=10)
+            )
+        )
+
+    # --- Create the figure --------------------------------------------------------
+    fig = go.Figure(
+        data=[edge_trace] + node_traces,
+        layout=go.Layout(
+            title="Lineage Visualization",
+            titlefont_size=16,
+            showlegend=True,
+            hovermode='closest',
+            margin=dict(b=20, l=20, r=20, t=40),
+            xaxis=dict(range=x_range, showgrid=False, zeroline=False, showticklabels=False),
+            yaxis=dict(range=y_range, showgrid=False, zeroline=False, showticklabels=False)
+        )
+    )
+    return fig
+
 class LineageHelper:
     def __init__(self):
         pass
 
-    def visualize_lineage(self, df: pd.DataFrame, short_names: bool = False, initial_zoom: float = 1.0):
+    def visualize_lineage(self, df: pd.DataFrame, short_names: bool = False, initial_zoom: float = 1.0, max_labeled_nodes: int = 300, summarize_threshold: int = 500):
         """
         Visualize a lineage graph given a DataFrame with columns:
         - SOURCE_OBJECT (JSON string)
@@ -27,178 +277,17 @@ class LineageHelper:
         short_names: If True, node labels will be shortened (e.g. by taking the last dot‐separated part).
         initial_zoom: A scale factor for the initial zoom level (default 1.0). Values > 1 zoom in;
                         values < 1 zoom out.
+        max_labeled_nodes: Node labels are drawn only if the graph has at most this many nodes (default 300).
+                        Larger graphs show labels on hover only, which keeps rendering fast.
+        summarize_threshold: Graphs with more nodes than this (default 500) are summarized before rendering:
+                        pass-through chains are collapsed into their upstream node of the same domain,
+                        whose marker size grows with the number of nodes it represents.
         
         Nodes are arranged in vertical columns by distance (with nodes farthest from the target on the left).
         Each node is colored based on its domain, and a legend is added for the node colors.
-        """
-        # Create an empty directed graph.
-        G = nx.DiGraph()
-
-        # Parse the ultimate target from row 0's TARGET_OBJECT and add it with distance 0.
-        ultimate_target = json.loads(df.iloc[0]["TARGET_OBJECT"])
-        ultimate_target_id = ultimate_target["name"]
-        G.add_node(ultimate_target_id, domain=ultimate_target.get("domain", "Unknown"), distance=0)
-
-        # Loop through each row to add nodes and edges.
-        # We assume that the "DISTANCE" column applies to the SOURCE_OBJECT.
-        for idx, row in df.iterrows():
-            # Parse the source object.
-            try:
-                src_obj = json.loads(row["SOURCE_OBJECT"])
-            except Exception as e:
-                print(f"Error parsing SOURCE_OBJECT at row {idx}: {e}")
-                continue
-            src_id = src_obj.get("name")
-            src_domain = src_obj.get("domain", "Unknown")
-            src_distance = row["DISTANCE"]  # distance from ultimate target
-
-            # Add or update source node with its distance (keeping the smaller distance if node exists).
-            if src_id in G.nodes:
-                G.nodes[src_id]["distance"] = min(G.nodes[src_id]["distance"], src_distance)
-            else:
-                G.add_node(src_id, domain=src_domain, distance=src_distance)
-
-            # Parse the target object.
-            try:
-                tgt_obj = json.loads(row["TARGET_OBJECT"])
-            except Exception as e:
-                print(f"Error parsing TARGET_OBJECT at row {idx}: {e}")
-                continue
-            tgt_id = tgt_obj.get("name")
-            tgt_domain = tgt_obj.get("domain", "Unknown")
-            # For non-ultimate targets we assign distance = (source distance - 1).
-            # (This works as long as the lineage chain is consistent.)
-            if tgt_id == ultimate_target_id:
-                tgt_distance = 0
-            else:
-                tgt_distance = row["DISTANCE"] - 1
-
-            if tgt_id in G.nodes:
-                G.nodes[tgt_id]["distance"] = min(G.nodes[tgt_id]["distance"], tgt_distance)
-            else:
-                G.add_node(tgt_id, domain=tgt_domain, distance=tgt_distance)
-
-            # Add an edge from source to target (i.e. upstream relationship).
-            G.add_edge(src_id, tgt_id)
-
-        # --- Compute layout positions ------------------------------------------------
-        # Arrange nodes in vertical columns by distance.
-        # Get the maximum distance (farthest from the ultimate target).
-        distances = [data["distance"] for _, data in G.nodes(data=True)]
-        max_distance = max(distances)
-
-        # Group nodes by their distance value.
-        distance_groups = {}  # distance -> list of node ids.
-        for node, data in G.nodes(data=True):
-            d = data["distance"]
-            distance_groups.setdefault(d, []).append(node)
-
-        # Assign positions:
-        #   x-coordinate: use max_distance - d so that nodes with highest d appear on the left.
-        #   y-coordinate: for nodes with the same d, spread them evenly vertically.
-        pos = {}
-        for d, nodes in distance_groups.items():
-            nodes_sorted = sorted(nodes)  # sort alphabetically for stability.
-            n = len(nodes_sorted)
-            # Create y positions so that they are centered around 0.
-            y_positions = np.linspace((n - 1) / 2, -(n - 1) / 2, n)
-            x = max_distance - d  # ultimate target (d=0) gets the rightmost x value.
-            for i, node in enumerate(nodes_sorted):
-                pos[node] = (x, y_positions[i])
-
-        # --- Determine axis ranges based on initial_zoom -----------------------------
-        # Compute the min and max for x and y positions.
-        xs = [p[0] for p in pos.values()]
-        ys = [p[1] for p in pos.values()]
-        if xs:
-            x_min, x_max = min(xs), max(xs)
-        else:
-            x_min, x_max = -1, 1
-        if ys:
-            y_min, y_max = min(ys), max(ys)
-        else:
-            y_min, y_max = -1, 1
-
-        # Compute center and half-width/half-height.
-        x_center = (x_min + x_max) / 2
-        y_center = (y_min + y_max) / 2
-        # Add a margin factor (here 1.2) so nodes are not at the very edge.
-        margin_factor = 1.2
-        x_half = ((x_max - x_min) / 2) * margin_factor / initial_zoom
-        y_half = ((y_max - y_min) / 2) * margin_factor / initial_zoom
-
-        x_range = [x_center - x_half, x_center + x_half]
-        y_range = [y_center - y_half, y_center + y_half]
-
-        # --- Create Plotly traces for edges ------------------------------------------
-        # Prepare a single trace for edges (drawn as line segments).
-        edge_x = []
-        edge_y = []
-        for u, v in G.edges():
-            x0, y0 = pos[u]
-            x1, y1 = pos[v]
-            edge_x.extend([x0, x1, None])
-            edge_y.extend([y0, y1, None])
-
-        edge_trace = go.Scatter(
-            x=edge_x, 
-            y=edge_y,
-            line=dict(width=1, color='#888'),
-            hoverinfo='none',
-            mode='lines'
-        )
 
-        # --- Create Plotly traces for nodes ------------------------------------------
-        # Define a color mapping for domains (customize as needed)
-        color_map = {
-            "MODEL": "#FF5733",         # reddish
-            "DATASET": "#33C3FF",        # blueish
-            "TABLE": "#33FF57",          # greenish
-            "FEATURE_VIEW": "#FF33F6",   # magenta-ish
-        }
-
-        # Group nodes by domain so that a separate trace (and legend entry) is created per domain.
-        domain_nodes = {}
-        for node, data in G.nodes(data=True):
-            domain = data.get("domain", "Unknown")
-            # Shorten the label if required.
-            label = node.split('.')[-1] if short_names else node
-            domain_nodes.setdefault(domain, {"x": [], "y": [], "text": []})
-            x, y = pos[node]
-            domain_nodes[domain]["x"].append(x)
-            domain_nodes[domain]["y"].append(y)
-            domain_nodes[domain]["text"].append(label)
-
-        node_traces = []
-        for domain, values in domain_nodes.items():
-            trace = go.Scatter(
-                x=values["x"],
-                y=values["y"],
-                mode='markers+text',
-                name=domain,  # legend entry will show the domain name.
-                text=values["text"],
-                textposition="bottom center",
-                hoverinfo='text',
-                marker=dict(
-                    showscale=False,
-                    color=color_map.get(domain, "#CCCCCC"),
-                    size=30,
-                    line_width=2
-                )
-            )
-            node_traces.append(trace)
-
-        # --- Create and show the figure ----------------------------------------------
-        fig = go.Figure(
-            data=[edge_trace] + node_traces,
-            layout=go.Layout(
-                title="Lineage Visualization",
-                titlefont_size=16,
-                showlegend=True,
-                hovermode='closest',
-                margin=dict(b=20, l=20, r=20, t=40),
-                xaxis=dict(range=x_range, showgrid=False, zeroline=False, showticklabels=False),
-                yaxis=dict(range=y_range, showgrid=False, zeroline=False, showticklabels=False)
-            )
-        )
+        Figures are cached per DataFrame, so errors about malformed rows are only printed
+        the first time a given DataFrame is visualized.
+        """
+        fig = _build_figure(df, short_names, initial_zoom, max_labeled_nodes, summarize_threshold)
         st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file